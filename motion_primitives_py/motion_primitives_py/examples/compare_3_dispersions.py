@@ -1,7 +1,5 @@
 from motion_primitives_py import *
 import time
-from pycallgraph import PyCallGraph, Config
-from pycallgraph.output import GraphvizOutput
 import rospkg
 import numpy as np
 import matplotlib.pyplot as plt
@@ -2,8 +2,6 @@ from motion_primitives_py import *
 import time
 import numpy as np
 import matplotlib.pyplot as plt
-from pycallgraph import PyCallGraph, Config
-from pycallgraph.output import GraphvizOutput
 from copy import deepcopy
 
 """
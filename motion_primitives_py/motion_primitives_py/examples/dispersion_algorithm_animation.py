@@ -2,8 +2,6 @@
 from motion_primitives_py import *
 import numpy as np
 import time
-from pycallgraph import PyCallGraph, Config
-from pycallgraph.output import GraphvizOutput
 
 """
 Animate the evolution of the min. dispersion algorithm
@@ -4,6 +4,52 @@ import numpy as np
 import matplotlib.pyplot as plt
 from copy import deepcopy
 from scipy.stats.qmc import Sobol
+from functools import lru_cache
+
+
+# Greedy loop of compute_min_dispersion_points for the simple norm, compiled
+# with numba when it is installed (pip3 install numba). Kept serial, parallel
+# numba threads deadlock with the fork()ed multiprocessing pools used to
+# compute the lattice nodes.
+def greedy_min_dispersion_indices(potential_sample_pts, min_score, num_output_pts):
+    """
+    Farthest point selection with euclidean distance.
+    Input:
+        potential_sample_pts, (K, N) candidates to downsample from
+        min_score, (K,) distances of the candidates to the first choice, with
+            the first choice set to -inf. Updated in place.
+        num_output_pts, number of points to choose
+    Output:
+        actual_sample_indices, (num_output_pts,) indices of the chosen points,
+            index 0 is left for the first choice
+    """
+    actual_sample_indices = np.zeros(num_output_pts, dtype=np.int64)
+    for mp_num in range(1, num_output_pts):
+        index = np.argmax(min_score)
+        actual_sample_indices[mp_num] = index
+        min_score[index] = -np.inf
+        for k in range(potential_sample_pts.shape[0]):
+            dist = 0.
+            for j in range(potential_sample_pts.shape[1]):
+                diff = potential_sample_pts[k, j] - potential_sample_pts[index, j]
+                dist += diff * diff
+            min_score[k] = min(min_score[k], np.sqrt(dist))
+    return actual_sample_indices
+
+
+@lru_cache(maxsize=None)
+def compiled_greedy_min_dispersion_indices():
+    """
+    greedy_min_dispersion_indices compiled with numba, or None if numba is not
+    installed (compute_min_dispersion_points falls back to its numpy loop).
+    numba is only imported on the first call, importing this module does not
+    load it.
+    """
+    try:
+        from numba import njit
+    except ImportError:
+        return None
+    return njit(cache=True)(greedy_min_dispersion_indices)
 
 
 class MotionPrimitiveGraph():
@@ -131,25 +177,58 @@ class MotionPrimitiveGraph():
         return scaled_sobol
 
     def dispersion_distance_fn_simple_norm(self, start_pts, end_pts):
-        score = np.linalg.norm(start_pts[:, np.newaxis]-end_pts, axis=2)
+        if len(end_pts) == 1:
+            # no (K, M, N) difference tensor to avoid for a single end point, take the exact norm
+            return np.linalg.norm(start_pts - end_pts, axis=1)[:, np.newaxis], None
+        # expand |x-y|^2 = |x|^2 + |y|^2 - 2x.y so the (K, M, N) difference tensor is never built,
+        # centered on a common mean first to limit cancellation when the points are far from the origin
+        center = (start_pts.sum(axis=0) + end_pts.sum(axis=0)) / (len(start_pts) + len(end_pts))
+        start_pts = start_pts - center
+        end_pts = end_pts - center
+        start_sq = np.einsum('ij,ij->i', start_pts, start_pts)
+        end_sq = np.einsum('ij,ij->i', end_pts, end_pts)
+        score_sq = start_sq[:, np.newaxis] + end_sq[np.newaxis, :] - 2 * start_pts @ end_pts.T
+        score = np.sqrt(np.maximum(score_sq, 0))  # clip round off below zero
         return score, None
 
     def compute_min_dispersion_points(self, num_output_pts, potential_sample_pts, starting_score, starting_output_sample_index):
+        """
+        Greedily pick num_output_pts of the potential sample points, each time
+        taking the point furthest from all previously chosen points.
+        Input:
+            num_output_pts, number of points to choose
+            potential_sample_pts, (K, N) candidates to downsample from
+            starting_score, (K,) distances of the candidates to the first choice
+            starting_output_sample_index, index of the first choice
+        Output:
+            actual_sample_pts, (num_output_pts, N) chosen points
+            actual_sample_indices, (num_output_pts,) indices of the chosen points
+        """
         actual_sample_indices = np.zeros((num_output_pts)).astype(int)
         actual_sample_indices[0] = starting_output_sample_index
 
-        # distances of potential sample points to closest chosen output MP node # bottleneck
-        min_score = np.ones((starting_score.shape[0], 2))*np.inf
-        min_score[:, 0] = np.amin(starting_score, axis=1)
+        # distances of potential sample points to closest chosen output MP node
+        min_score = np.array(starting_score, dtype=float).ravel()
+        assert min_score.shape == (len(potential_sample_pts),), \
+            f"starting_score must hold one distance per potential sample point, got shape {np.shape(starting_score)}"
+        min_score[starting_output_sample_index] = -np.inf  # give nodes we have already chosen low score
+        greedy_indices = None
+        if self.dispersion_distance_fn == self.dispersion_distance_fn_simple_norm:
+            greedy_indices = compiled_greedy_min_dispersion_indices()
+        if greedy_indices is not None:
+            actual_sample_indices[1:] = greedy_indices(np.ascontiguousarray(potential_sample_pts, dtype=float),
+                                                       min_score, num_output_pts)[1:]
+            return potential_sample_pts[actual_sample_indices], actual_sample_indices
+
         for mp_num in range(1, num_output_pts):  # start at 1 because we already chose the closest point as a motion primitive
-            # distances of potential sample points to closest chosen output MP node
-            min_score[:, 0] = np.amin(min_score, axis=1)
             # take the new point with the maximum distance to its closest node
-            index = np.argmax(min_score[:, 0])
+            index = np.argmax(min_score)
             result_pt = potential_sample_pts[index, :]
-            actual_sample_indices[mp_num] = np.array((index))
-            min_score[index, 0] = - np.inf  # give nodes we have already chosen low score
-            min_score[:, 1] = self.dispersion_distance_fn(potential_sample_pts, result_pt)  # new point's score
+            actual_sample_indices[mp_num] = index
+            min_score[index] = -np.inf
+            # only the distance to the newly chosen point can lower a score
+            new_score = self.dispersion_distance_fn(potential_sample_pts, result_pt[np.newaxis, :])[0][:, 0]
+            np.minimum(min_score, new_score, out=min_score)
         actual_sample_pts = potential_sample_pts[actual_sample_indices]
         return actual_sample_pts, actual_sample_indices
 
@@ -177,7 +177,7 @@ class MotionPrimitiveLattice(MotionPrimitiveGraph):
         # initialize data structures
         mp_adjacency_matrix_fwd = np.empty((num_output_pts * self.num_tiles, len(potential_sample_pts)), dtype=object)
         actual_sample_indices = np.zeros((num_output_pts)).astype(int)
-        min_score = np.ones((len(potential_sample_pts), 2)) * np.inf
+        min_score = np.ones(len(potential_sample_pts)) * np.inf  # distance of each sample to the closest vertex so far
         # create multiprocessing pool to compute MPs
         pool = Pool(initializer=self.multiprocessing_init)
 
@@ -190,23 +190,23 @@ class MotionPrimitiveLattice(MotionPrimitiveGraph):
             print(potential_sample_pts[index])
 
             # update scores of nodes
-            min_score[index, 0] = -np.inf  # give node we chose low score
+            min_score[index] = -np.inf  # give node we chose low score
             if self.num_tiles > 1:
                 end_pts = self.tile_points([potential_sample_pts[index, :]])
             else:
                 end_pts = potential_sample_pts[index, :][np.newaxis, :]
 
             min_score_fwd, mp_list_fwd = self.multiprocessing_dispersion_distance_fn_trajectory(pool, potential_sample_pts, end_pts)
+            new_score = np.nanmin(min_score_fwd, axis=1)
             if check_backwards_dispersion:
                 min_score_bwd, _ = self.multiprocessing_dispersion_distance_fn_trajectory(pool, end_pts, potential_sample_pts)
-                # min_score[:, 1] = np.nanmin(np.maximum(min_score_fwd, min_score_bwd.T),axis=1)
-                min_score[:, 1] = np.maximum(np.nanmin(min_score_fwd, axis=1), np.nanmin(min_score_bwd.T, axis=1))
-            else:
-                min_score[:, 1] = np.nanmin(min_score_fwd, axis=1)
+                # new_score = np.nanmin(np.maximum(min_score_fwd, min_score_bwd.T),axis=1)
+                new_score = np.maximum(new_score, np.nanmin(min_score_bwd.T, axis=1))
 
-            min_score[:, 0] = np.nanmin(min_score, axis=1)
+            np.fmin(min_score, new_score, out=min_score)  # like nanmin, a nan score (no valid trajectory) does not replace a distance
+            max_score = np.max(min_score)
 
-            if np.isnan(np.max(min_score[:, 0])):
+            if np.isnan(max_score):
                 if i == 1:
                     print("ERROR: some sample points have no valid trajectories from the origin. Exiting")
                 else:
@@ -214,7 +214,7 @@ class MotionPrimitiveLattice(MotionPrimitiveGraph):
                 raise SystemExit
             else:
 
-                index = np.squeeze(np.argwhere(min_score[:, 0] == np.max(min_score[:, 0])), axis=1)
+                index = np.flatnonzero(min_score == max_score)
                 # Do tie-breaking with picking node furthest from other nodes in sample set in state space
                 if index.shape[0] > 1:
                     dispersion_simple_norm = self.dispersion_distance_fn_simple_norm(
@@ -223,7 +223,7 @@ class MotionPrimitiveLattice(MotionPrimitiveGraph):
                 else:
                     index = index[0]
 
-            if np.isinf(min_score[index, 0]):
+            if np.isinf(min_score[index]):
                 print("""WARNING: no new valid trajectories to *a* point in the
                     sample set. Not exiting.""")
                 # raise SystemExit
@@ -232,7 +232,7 @@ class MotionPrimitiveLattice(MotionPrimitiveGraph):
             mp_adjacency_matrix_fwd[i * self.num_tiles:(i + 1) * self.num_tiles, :] = mp_list_fwd.T
 
             # update dispersion metric
-            self.dispersion = max(min_score[:, 0])
+            self.dispersion = max_score
             if np.isnan(self.dispersion):
                 self.dispersion = 10**10
             self.dispersion_list.append(self.dispersion)
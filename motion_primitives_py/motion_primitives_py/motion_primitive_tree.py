@@ -1,11 +1,62 @@
 from motion_primitives_py import MotionPrimitiveGraph
+import motion_primitives_py
 import numpy as np
 import matplotlib.pyplot as plt
+from multiprocessing import Pool
 
 
 class MotionPrimitiveTree(MotionPrimitiveGraph):
     """
     """
+    @classmethod
+    def load(cls, filename, plot=False):
+        """
+        create a motion primitive tree and its lookup table from a given npz file
+        """
+        with np.load(filename) as data:
+            print("Reading tree from", filename, "...")
+            mpt = cls(control_space_q=int(data["control_space_q"]),
+                      num_dims=int(data["num_dims"]),
+                      max_state=data["max_state"],
+                      motion_primitive_type=getattr(motion_primitives_py, str(data["mp_type"])),
+                      plot=plot)
+            mpt.start_pts = data["start_pts"]
+            mpt.dts = data["dts"]
+            mpt.us = data["us"]
+            mpt.end_states = data["end_states"]
+        print("Tree successfully read")
+        return mpt
+
+    def save(self, filename=None):
+        """
+        save the motion primitive lookup table to a compressed npz file
+        """
+        if filename is None:
+            filename = f"{self.saving_file_prefix}_tree.npz"
+        np.savez_compressed(filename,
+                            control_space_q=self.control_space_q,
+                            num_dims=self.num_dims,
+                            max_state=self.max_state,
+                            mp_type=self.motion_primitive_type.__name__,
+                            start_pts=self.start_pts,
+                            dts=self.dts,
+                            us=self.us,
+                            end_states=self.end_states)
+        print("Tree successfully saved")
+
+    def uniform_input_set(self, num_u_per_dimension):
+        """
+        Evenly sample num_u_per_dimension inputs between -max_u and max_u in
+        every dimension and return their Cartesian product as a
+        (num_dims, num_u_per_dimension**num_dims) array, in meshgrid order.
+        The open grids of a sparse meshgrid are only broadcast, not
+        materialized, before stacking into the output.
+        """
+        # max control input #TODO should be a vector b/c perhaps different in Z
+        max_u = self.max_state[self.control_space_q]
+        single_u_set = np.linspace(-max_u, max_u, num_u_per_dimension)
+        u_grid = np.broadcast_arrays(*np.meshgrid(*[single_u_set for i in range(self.num_dims)], sparse=True))
+        return np.stack(u_grid).reshape(self.num_dims, -1)
 
     def get_neighbor_mps(self, start_pt, dt, num_u_per_dimension):
         """
@@ -14,10 +65,7 @@ class MotionPrimitiveTree(MotionPrimitiveGraph):
         i.e. old sikang method
         """
         # create evenly sampled inputs
-        max_u = self.max_state[self.control_space_q]
-        single_u_set = np.linspace(-max_u, max_u, num_u_per_dimension)
-        u_grid = np.meshgrid(*[single_u_set for i in range(self.num_dims)])
-        u_set = np.dstack(([x.flatten() for x in u_grid]))[0]
+        u_set = self.uniform_input_set(num_u_per_dimension).T
 
         # convert into motion primitives
         dynamics = self.mp_subclass_specific_data['dynamics']
@@ -40,14 +88,9 @@ class MotionPrimitiveTree(MotionPrimitiveGraph):
         max_dt Max time horizon of MP
 
         """
-        # max control input #TODO should be a vector b/c perhaps different in Z
-        max_u = self.max_state[self.control_space_q]
-
-        single_u_set = np.linspace(-max_u, max_u, num_u_set)
         dt_set = np.linspace(min_dt, max_dt, num_dts)
-        u_grid = np.meshgrid(*[single_u_set for i in range(self.num_dims)])
-        u_set = np.dstack(([x.flatten() for x in u_grid]))[0].T
-        sample_pts = np.array(self.quad_dynamics_polynomial(start_pt, u_set[:, :, np.newaxis], dt_set[np.newaxis, :]))
+        u_set = self.uniform_input_set(num_u_set)
+        sample_pts = self.mp_subclass_specific_data['dynamics'](start_pt, u_set[:, :, np.newaxis], dt_set[np.newaxis, :])
         sample_pts = np.transpose(sample_pts, (2, 1, 0))
 
         if self.plot:
@@ -72,17 +115,15 @@ class MotionPrimitiveTree(MotionPrimitiveGraph):
         num_output_mps = num_u_per_dimension**self.num_dims  # number of total motion primitives
 
         self.dispersion_distance_fn = self.dispersion_distance_fn_simple_norm
-        score = np.ones((num_dts*num_u_set**self.num_dims, num_output_mps))*np.inf
         potential_sample_pts, dt_set, u_set = self.compute_all_possible_mps(start_pt, num_u_set, num_dts, min_dt, max_dt)
         potential_sample_pts = potential_sample_pts.reshape(
             potential_sample_pts.shape[0]*potential_sample_pts.shape[1], potential_sample_pts.shape[2])
         # Take the closest motion primitive as the first choice (may want to change later)
         first_score = np.linalg.norm(potential_sample_pts-start_pt.T, axis=1)
         closest_pt = np.argmin(first_score)
-        score[:, 0] = first_score
 
         actual_sample_pts, actual_sample_indices = self.compute_min_dispersion_points(
-            num_output_mps, potential_sample_pts, score, closest_pt)
+            num_output_mps, potential_sample_pts, first_score, closest_pt)
 
         actual_sample_indices = np.unravel_index(actual_sample_indices, (num_dts, num_u_set**self.num_dims))
         # Else compute minimum dispersion points over the whole state space (can be quite slow) (very similar to original Dispertio)
@@ -92,16 +133,35 @@ class MotionPrimitiveTree(MotionPrimitiveGraph):
         if self.plot:
             if self.num_dims > 1:
                 plt.plot(actual_sample_pts[:, 0], actual_sample_pts[:, 1], 'om')
-                self.create_evenly_spaced_mps(start_pt, max_dt/2.0, num_u_per_dimension)
+                self.get_neighbor_mps(start_pt, max_dt/2.0, num_u_per_dimension)
             else:
                 plt.plot(actual_sample_pts[:, 0], np.zeros(actual_sample_pts.shape), 'om')
 
         return np.vstack((dts, us))
 
-    def create_state_space_MP_lookup_table_tree(self, num_u_per_dimension, num_state_deriv_pts, num_u_set, num_dts, min_dt, max_dt):
+    def multiprocessing_init(self):
+        # hacky stuff to avoid pickling lambda functions
+        global mp_subclass_specific_data
+        mp_subclass_specific_data = self.mp_subclass_specific_data
+
+    def multiprocessing_compute_min_dispersion_set(self, args):
+        """
+        compute_min_dispersion_set for a multiprocessing worker, restoring the
+        subclass specific data (with dynamics) that could not be pickled with self
+        """
+        self.mp_subclass_specific_data = mp_subclass_specific_data
+        return self.compute_min_dispersion_set(*args)
+
+    def create_state_space_MP_lookup_table_tree(self, num_u_per_dimension, num_state_deriv_pts, num_u_set, num_dts, min_dt, max_dt, filename=None):
         """
         Uniformly sample the state space, and for each sample independently
         calculate a minimum dispersion set of motion primitives.
+        The lookup table is stored as arrays over the S start points and M motion primitives per start point:
+            start_pts, (S, n)
+            dts, (S, M) durations of the motion primitives
+            us, (S, num_dims, M) inputs of the motion primitives
+            end_states, (S, M, n) end states of the motion primitives
+        and saved to filename (see save).
         """
 
         # Numpy nonsense that could be cleaner. Generate start pts at lots of initial conditions of the derivatives.
@@ -109,21 +169,42 @@ class MotionPrimitiveTree(MotionPrimitiveGraph):
         y = np.array([np.tile(np.linspace(-i, i, num_state_deriv_pts), (self.num_dims, 1))
                       for i in self.max_state[1:self.control_space_q]])  # start at 1 to skip position
         z = np.reshape(y, (y.shape[0]*y.shape[1], y.shape[2]))
-        start_pts_grid = np.meshgrid(*z)
-        start_pts_set = np.dstack(([x.flatten() for x in start_pts_grid]))[0].T
-        start_pts_set = np.vstack((np.zeros_like(start_pts_set[:self.num_dims, :]), start_pts_set))
-
-        prim_list = []
-        for start_pt in start_pts_set.T:
-            prim_list.append(self.compute_min_dispersion_set(np.reshape(start_pt, (self.n, 1)),
-                                                             num_u_per_dimension, num_u_set, num_dts, min_dt, max_dt))
-            print(str(len(prim_list)) + '/' + str(start_pts_set.shape[1]))
+        # Cartesian product of z in meshgrid order, broadcasting the open grids straight into the output
+        # (positions stay zero) instead of materializing and flattening a dense grid per axis
+        start_pts_grid = np.broadcast_arrays(*np.meshgrid(*z, sparse=True))
+        start_pts_set = np.zeros((self.n, start_pts_grid[0].size))
+        start_pts_set[self.num_dims:] = np.reshape(start_pts_grid, (len(z), -1))
+
+        args = ((np.reshape(start_pt, (self.n, 1)), num_u_per_dimension, num_u_set, num_dts, min_dt, max_dt)
+                for start_pt in start_pts_set.T)
+        num_start_pts = start_pts_set.shape[1]
+        num_output_mps = num_u_per_dimension**self.num_dims
+        self.dts = np.empty((num_start_pts, num_output_mps))
+        self.us = np.empty((num_start_pts, self.num_dims, num_output_mps))
+        if self.plot:
+            pool = None
+            prim_list = (self.compute_min_dispersion_set(*arg) for arg in args)
+        else:
+            # every start point is independent, compute them on all cores
+            pool = Pool(initializer=self.multiprocessing_init)
+            dynamics = self.mp_subclass_specific_data.get('dynamics', None)
+            self.mp_subclass_specific_data['dynamics'] = None  # hacky stuff to avoid pickling lambda functions
+            prim_list = pool.imap(self.multiprocessing_compute_min_dispersion_set, args)
+        for i, prims in enumerate(prim_list):
+            self.dts[i] = prims[0]
+            self.us[i] = prims[1:]
+            print(str(i + 1) + '/' + str(num_start_pts))
             if self.plot:
                 plt.show()
+        if pool is not None:
+            self.mp_subclass_specific_data['dynamics'] = dynamics
+            pool.close()  # end multiprocessing pool
 
         self.start_pts = start_pts_set.T
-        self.motion_primitives_list = prim_list
-        self.pickle_self()
+        # end states of all motion primitives in one broadcast evaluation of the dynamics
+        self.end_states = np.transpose(self.mp_subclass_specific_data['dynamics'](
+            self.start_pts.T[:, :, np.newaxis], np.transpose(self.us, (1, 0, 2)), self.dts), (1, 2, 0))
+        self.save(filename)
 
 
 def create_many_state_space_lookup_tables(max_control_space):
@@ -149,7 +230,7 @@ if __name__ == "__main__":
     from motion_primitives_py import InputsMotionPrimitive
     mpt = MotionPrimitiveTree(control_space_q, num_dims,  max_state, InputsMotionPrimitive, plot=True)
     start_pt = np.ones((mpt.n))
-    mps = mpt.create_evenly_spaced_mps(start_pt, 1, num_u_per_dimension)
+    mps = mpt.get_neighbor_mps(start_pt, 1, num_u_per_dimension)
     for mp in mps:
         mp.plot(position_only=True, ax=mpt.ax)
 
@@ -1,9 +1,6 @@
 from motion_primitives_py import MotionPrimitive
 import numpy as np
 import matplotlib.pyplot as plt
-import sympy as sym
-from scipy.linalg import expm
-import scipy.integrate as integrate
 
 
 class EuclideanMotionPrimitive(MotionPrimitive):
@@ -19,6 +16,17 @@ class EuclideanMotionPrimitive(MotionPrimitive):
         self.is_valid = True
         self.cost = np.linalg.norm(start_state-end_state)
 
+    def get_state(self, t):
+        """
+        Evaluate full state of the straight line at given fractions of the way
+        from start to end state (the parametrization of get_sampled_states)
+        Input:
+            t, numpy array of fractions in [0, 1] to sample at
+        Return:
+            state, a numpy array of size (n, len(t))
+        """
+        return self.start_state[:, np.newaxis] + (self.end_state - self.start_state)[:, np.newaxis] * np.atleast_1d(t)
+
     def get_sampled_position(self, step_size=0.1):
         sampling_array = self.get_sampled_states(step_size)
         return sampling_array[0, :], sampling_array[1:, :]
@@ -1,8 +1,38 @@
 from motion_primitives_py import MotionPrimitive
-from scipy.special import factorial
 import matplotlib.pyplot as plt
 import sympy as sym
 import numpy as np
+from functools import lru_cache
+from math import factorial
+
+
+@lru_cache(maxsize=None)
+def _dynamics_coefficients(control_space_q, num_dims):
+    """
+    coeffs[i, p, k], coefficient of t**p in state i of the chain of
+    integrators multiplying the k-th entry of (start_pt, u). Derived with
+    sympy once per (control_space_q, num_dims).
+    """
+    start_pt = sym.Matrix([sym.symbols(f'start_pt{i}') for i in range(control_space_q * num_dims)])
+    u = sym.Matrix([sym.symbols(f'u{i}') for i in range(num_dims)])
+    t = sym.symbols('t')
+    x = u * t**control_space_q / factorial(control_space_q)
+    for i in range(control_space_q):
+        x += sym.Matrix(start_pt[i * num_dims:(i + 1) * num_dims]) * t**i / factorial(i)
+    pos = x
+    for j in range(1, control_space_q):
+        d = sym.diff(pos, t, j)
+        x = np.vstack((x, d))
+    x = x.T[0]
+
+    variables = list(start_pt) + list(u)
+    coeffs = np.zeros((len(x), control_space_q + 1, len(variables)))
+    for i, x_i in enumerate(x):
+        for (p,), c in sym.Poly(x_i, t).terms():
+            for k, v in enumerate(variables):
+                coeffs[i, p, k] = c.coeff(v)
+    coeffs.setflags(write=False)
+    return coeffs
 
 
 class InputsMotionPrimitive(MotionPrimitive):
@@ -81,18 +111,24 @@ class InputsMotionPrimitive(MotionPrimitive):
 
     @staticmethod
     def get_dynamics_polynomials(control_space_q, num_dims):
-        start_pt = sym.Matrix([sym.symbols(f'start_pt{i}') for i in range(control_space_q * num_dims)])
-        u = sym.Matrix([sym.symbols(f'u{i}') for i in range(num_dims)])
-        t = sym.symbols('t')
-        x = u * t**control_space_q / factorial(control_space_q)
-        for i in range(control_space_q):
-            x += sym.Matrix(start_pt[i * num_dims:(i + 1) * num_dims]) * t**i / factorial(i)
-        pos = x
-        for j in range(1, control_space_q):
-            d = sym.diff(pos, t, j)
-            x = np.vstack((x, d))
-        x = x.T[0]
-        return sym.lambdify([start_pt, u, t], x)
+        """
+        Build the state of the chain of integrators driven by a constant input
+        as a function dynamics(start_pt, u, t). The state is polynomial in t
+        with coefficients linear in start_pt and u, so the coefficients are
+        extracted from sympy once and evaluated with numpy (Horner in t).
+        start_pt, u and t broadcast against each other, the returned array has
+        shape (control_space_q * num_dims, *broadcast shape).
+        """
+        coeffs = _dynamics_coefficients(int(control_space_q), int(num_dims))
+
+        def dynamics(start_pt, u, t):
+            *values, t = np.broadcast_arrays(*start_pt, *u, t)
+            poly = np.tensordot(coeffs, np.array(values, dtype=float), axes=(2, 0))
+            state = poly[:, -1]
+            for p in range(control_space_q - 1, -1, -1):
+                state = state * t + poly[:, p]
+            return state
+        return dynamics
 
 
 if __name__ == "__main__":
@@ -16,12 +16,10 @@ class JerksMotionPrimitive(MotionPrimitive):
         super().__init__(start_state, end_state, num_dims, max_state, subclass_specific_data)
         assert(self.control_space_q == 3), "This function only works for jerk input space (and maybe acceleration input space one day)"
 
-        # start point # ugly but this is faster than using np.split
-        p0, v0, a0 = self.start_state[:self.num_dims]+1e-5, self.start_state[self.num_dims:2 *
-                                                                             self.num_dims]+1e-5, self.start_state[2*self.num_dims:3*self.num_dims]+1e-5
+        # start point, the rows of a (control_space_q, num_dims) reshape
+        p0, v0, a0 = self.start_state.reshape(self.control_space_q, self.num_dims) + 1e-5
         # end point
-        p1, v1, a1 = self.end_state[:self.num_dims]+1e-5, self.end_state[self.num_dims:2 *
-                                                                         self.num_dims]+1e-5, self.end_state[2*self.num_dims:3*self.num_dims]+1e-5
+        p1, v1, a1 = self.end_state.reshape(self.control_space_q, self.num_dims) + 1e-5
         # state and input limits
         v_max, a_max, j_max = self.max_state[1:1+self.control_space_q] + 1e-5  # numerical hack for library seg fault
         v_min, a_min, j_min = -self.max_state[1:1+self.control_space_q] - 1e-5
@@ -77,17 +75,17 @@ class JerksMotionPrimitive(MotionPrimitive):
         """
 
         # call to optimization library to evaluate at time t
-        sj, sa, sv, sp = min_time_bvp.sample(self.start_state[:self.num_dims], self.start_state[self.num_dims:2 *
-                                                                                                self.num_dims], self.start_state[2*self.num_dims:3*self.num_dims], self.switch_times, self.jerks, t)
+        p0, v0, a0 = self.start_state.reshape(self.control_space_q, self.num_dims)
+        sj, sa, sv, sp = min_time_bvp.sample(p0, v0, a0, self.switch_times, self.jerks, t)
         return np.squeeze(np.concatenate([sp, sv, sa]))  # TODO concatenate may be slow because allocates new memory
 
     def get_sampled_states(self, step_size=0.1):
-        p0, v0, a0 = np.split(self.start_state, self.control_space_q)
+        p0, v0, a0 = self.start_state.reshape(self.control_space_q, self.num_dims)
         st, sj, sa, sv, sp = min_time_bvp.uniformly_sample(p0, v0, a0, self.switch_times, self.jerks, dt=step_size)
         return np.vstack((st, sp, sv, sa, sj))
 
     def get_sampled_position(self, step_size=0.1):
-        p0, v0, a0 = np.split(self.start_state, self.control_space_q)
+        p0, v0, a0 = self.start_state.reshape(self.control_space_q, self.num_dims)
         st, sp = min_time_bvp.uniformly_sample_position(p0, v0, a0, self.switch_times, self.jerks, dt=step_size)
         return st, sp
 
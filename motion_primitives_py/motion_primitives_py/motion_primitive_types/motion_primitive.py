@@ -93,21 +93,24 @@ class MotionPrimitive():
         """
         raise NotImplementedError
 
-    def plot_from_sampled_states(self, sampling_array, position_only=False, ax=None, color=None, zorder=1):
+    def plot_from_sampled_states(self, sampling_array, position_only=False, ax=None, color=None, zorder=1, axes=None):
         """
         Plot time vs. position, velocity, acceleration, and jerk
+        The full state is plotted on axes (4 axes, one per derivative), a new figure is only created if axes is None.
+        The axes that were plotted on are returned, pass them to the next call to overlay several motion primitives.
         """
         # Plot the state over time.
         if color is None:
             color = 'lightgrey'
         if not position_only:
-            fig, axes = plt.subplots(4, 1, sharex=True)
-            axes[3].set_xlabel('time')
-            fig.suptitle('Full State over Time')
-            axes[0].set_ylabel("Position")
-            axes[1].set_ylabel("Velocity")
-            axes[2].set_ylabel("Acceleration")
-            axes[3].set_ylabel("Jerk")
+            if axes is None:
+                fig, axes = plt.subplots(4, 1, sharex=True)
+                axes[3].set_xlabel('time')
+                fig.suptitle('Full State over Time')
+                axes[0].set_ylabel("Position")
+                axes[1].set_ylabel("Velocity")
+                axes[2].set_ylabel("Acceleration")
+                axes[3].set_ylabel("Jerk")
             labels = ['x', 'y', 'z']
             for j in range(self.control_space_q+1):
                 for i in range(self.num_dims):
@@ -116,6 +119,7 @@ class MotionPrimitive():
                         axes[j].plot([0, sampling_array[0, -1]], [self.max_state[j], self.max_state[j]], 'k--')
                         axes[j].plot([0, sampling_array[0, -1]], [-self.max_state[j], -self.max_state[j]], 'k--')
             axes[0].legend()
+            return axes
 
         else:
             if ax is None:
@@ -125,8 +129,9 @@ class MotionPrimitive():
                 ax.plot(samples[0, :], samples[1, :], color=color, zorder=zorder)
             elif self.num_dims == 3:
                 ax.plot(samples[0, :], samples[1, :], samples[2, :], color=color, zorder=zorder)
+            return ax
 
-    def plot(self, position_only=False, ax=None, color=None, zorder=1, step_size=.1):
+    def plot(self, position_only=False, ax=None, color=None, zorder=1, step_size=.1, axes=None):
         """
         Generate the sampled state and input trajectories and plot them
         """
@@ -136,7 +141,7 @@ class MotionPrimitive():
             sampling_array = state_sampling
             if input_sampling is not None:
                 sampling_array = np.vstack((state_sampling, input_sampling))
-            self.plot_from_sampled_states(sampling_array, position_only, ax, color, zorder)
+            return self.plot_from_sampled_states(sampling_array, position_only, ax, color, zorder, axes)
         else:
             print("Trajectory was not found")
 
@@ -1,7 +1,7 @@
 from motion_primitives_py import MotionPrimitive, PolynomialMotionPrimitive
 import numpy as np
 import cvxpy as cvx
-from scipy.signal import cont2discrete
+from math import factorial
 import matplotlib.pyplot as plt
 from scipy.optimize import minimize_scalar
 
@@ -21,6 +21,9 @@ class OptimizationMotionPrimitive(PolynomialMotionPrimitive):
         self.steps = self.subclass_specific_data.get('iterative_bvp_steps', 4)  # number of time steps in inner_bvp
         self.max_dt = max_t/self.steps
         self.c_A, self.c_B = OptimizationMotionPrimitive.A_and_B_matrices_quadrotor(self.num_dims, self.control_space_q)
+        # A is nilpotent (A**control_space_q = 0), precompute the powers that appear in its discretization
+        self.c_A_powers = [np.linalg.matrix_power(self.c_A, k) for k in range(self.control_space_q)]
+        self.c_A_powers_B = [A_k @ self.c_B for A_k in self.c_A_powers]
 
         self.max_state[0] = np.inf  # do not enforce position constraints
         self.x_box = np.repeat(self.max_state[:self.control_space_q], self.num_dims)
@@ -50,6 +53,16 @@ class OptimizationMotionPrimitive(PolynomialMotionPrimitive):
         B[-num_dims:, :] = np.eye(num_dims)
         return A, B
 
+    def discretize(self, dt):
+        """
+        Zero order hold discretization of the continuous integrator for time step dt.
+        Because A is nilpotent the matrix exponential and its integral are finite sums:
+            A_d = sum_k A**k dt**k / k!,  B_d = sum_k A**k B dt**(k+1) / (k+1)!
+        """
+        A = sum(A_k * dt**k / factorial(k) for k, A_k in enumerate(self.c_A_powers))
+        B = sum(A_k_B * dt**(k+1) / factorial(k+1) for k, A_k_B in enumerate(self.c_A_powers_B))
+        return A, B
+
     def outer_bvp(self):
         """
         Given a function inner_bvp that finds an optimal motion primitive given a time allocation, finds the optimal time allocation.
@@ -129,9 +142,7 @@ class OptimizationMotionPrimitive(PolynomialMotionPrimitive):
             return
 
         # Transform a continuous to a discrete state-space system, given dt
-        sysd = cont2discrete((self.c_A, self.c_B, np.eye(self.n), 0), dt)
-        A = sysd[0]
-        B = sysd[1]
+        A, B = self.discretize(dt)
         cost = 0  # initializing cost
 
         dynamic_constraints = []
@@ -226,9 +237,7 @@ class OptimizationMotionPrimitive(PolynomialMotionPrimitive):
 
 if __name__ == "__main__":
     import time
-
-    from pycallgraph import PyCallGraph, Config
-    from pycallgraph.output import GraphvizOutput
+    import cProfile
     rho = 1e3
     max_t = 20
     num_dims = 2
@@ -239,10 +248,10 @@ if __name__ == "__main__":
     max_state = [0, 2, 3, 10]
     subclass_specific_data = {'rho': rho, 'iterative_bvp_max_t': max_t, 'iterative_bvp_steps' : 10}
 
-    with PyCallGraph(output=GraphvizOutput(), config=Config(max_depth=5)):
-
+    with cProfile.Profile() as profiler:
         mp = OptimizationMotionPrimitive(start_state, end_state, num_dims, max_state,
                                          subclass_specific_data=subclass_specific_data)
+    profiler.print_stats(sort='cumulative')
     t = time.time()
 
     mp = OptimizationMotionPrimitive(start_state, end_state, num_dims, max_state,
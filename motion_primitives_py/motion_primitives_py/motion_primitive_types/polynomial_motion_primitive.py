@@ -1,9 +1,88 @@
 from motion_primitives_py import MotionPrimitive
+from functools import lru_cache
+from math import factorial, perm
 import numpy as np
 import matplotlib.pyplot as plt
-import sympy as sym
-from scipy.linalg import expm
-import scipy.integrate as integrate
+
+
+@lru_cache(maxsize=None)
+def _basis_derivative_coefficients(order):
+    """
+    Coefficients and exponents of the derivatives of [t**order, ..., t, 1],
+    the kth derivative is coeffs[k] * t**powers[k]. The kth derivative of
+    t**n is n!/(n-k)! * t**(n-k), zero for k > n.
+    """
+    n = np.arange(order, -1, -1)  # exponent of each column
+    k = np.arange(order + 1)[:, np.newaxis]  # derivative of each row
+    coeffs = np.array([[perm(n_i, k_j) for n_i in n] for k_j in range(order + 1)], dtype=float)
+    powers = np.maximum(n - k, 0).astype(float)
+    coeffs.setflags(write=False)
+    powers.setflags(write=False)
+    return coeffs, powers
+
+
+@lru_cache(maxsize=None)
+def _boundary_matrix_terms(control_space_q):
+    """
+    Pieces of the boundary value matrix A(T) for a polynomial of order
+    2*control_space_q-1. The rows fixing the first control_space_q
+    derivatives at t=0 only have the i! of t**i in the ith row, returned as
+    start_factorials. The rows at t=T are A[control_space_q:] = coeffs * T**powers.
+    """
+    coeffs, powers = _basis_derivative_coefficients(2 * control_space_q - 1)
+    start_factorials = np.array([factorial(i) for i in range(control_space_q)], dtype=float)
+    start_factorials.setflags(write=False)
+    return start_factorials, coeffs[:control_space_q], powers[:control_space_q]
+
+
+@lru_cache(maxsize=None)
+def _poly_multiplier(poly_order, num_dims):
+    """
+    Rows of the basis derivative coefficients, shifted right by the
+    derivative number and repeated for every dimension, used by
+    evaluate_polynomial_at_derivative_static.
+    """
+    coeffs, _ = _basis_derivative_coefficients(poly_order)
+    poly_multiplier = np.array([np.concatenate((np.zeros(deriv_num), coeffs[deriv_num]))[:(poly_order+1)]
+                                for deriv_num in range(poly_order) for i in range(num_dims)])
+    poly_multiplier.setflags(write=False)
+    return poly_multiplier
+
+
+def _basis_derivative(coeffs, powers):
+    return lambda t: coeffs * np.power(t, powers)
+
+
+def _centered_states(start_state, end_state, num_dims):
+    """
+    start_state and end_state ((..., n) arrays) translated so that the start
+    position is zero, the BVP (apart from the constant term) only depends on these.
+    Rounded so that the round-off of translating the end position does not
+    change them between translated copies.
+    """
+    start_state = np.array(start_state, dtype=float)
+    end_state = np.array(end_state, dtype=float)
+    end_state[..., :num_dims] -= start_state[..., :num_dims]
+    start_state[..., :num_dims] = 0
+    return np.round(start_state, 10), np.round(end_state, 10)
+
+
+@lru_cache(maxsize=4096)
+def _canonical_solve(rel_start, rel_end, num_dims, max_state, dt, max_t):
+    """
+    iteratively_solve_bvp_meam_620_style for a start and end state (tuples)
+    of the start position centered at zero, so that translated copies of a
+    motion primitive are only solved once. The returned polys are a read-only
+    copy, not a view into the stack of all candidate solutions.
+    """
+    poly_order = 2 * (len(rel_start) // num_dims) - 1
+    polys, traj_time = PolynomialMotionPrimitive.iteratively_solve_bvp_meam_620_style(
+        np.array(rel_start), np.array(rel_end), num_dims, np.array(max_state),
+        PolynomialMotionPrimitive.get_dynamics_polynomials(poly_order), dt, max_t, _poly_multiplier(poly_order, num_dims))
+    if polys is not None:
+        polys = polys.copy()
+        polys.setflags(write=False)
+    return polys, traj_time
 
 
 class PolynomialMotionPrimitive(MotionPrimitive):
@@ -19,10 +98,59 @@ class PolynomialMotionPrimitive(MotionPrimitive):
         self.poly_order = 2 * self.control_space_q - 1
         self.polynomial_setup(self.poly_order)
 
-        # Solve boundary value problem
-        self.poly_coeffs, self.traj_time = self.iteratively_solve_bvp_meam_620_style(
-            self.start_state, self.end_state, self.num_dims,
-            self.max_state, self.subclass_specific_data['dynamics'], subclass_specific_data.get('iterative_bvp_dt', .2), subclass_specific_data.get('iterative_bvp_max_t', 2), self.poly_multiplier)
+        # Solve boundary value problem, translated to a start position of zero to share the solution between
+        # translated copies (the start position is only the constant term of the polynomials)
+        rel_start, rel_end = _centered_states(self.start_state, self.end_state, self.num_dims)
+        polys, traj_time = _canonical_solve(
+            tuple(rel_start.tolist()), tuple(rel_end.tolist()), int(self.num_dims), tuple(np.asarray(self.max_state, dtype=float).tolist()),
+            subclass_specific_data.get('iterative_bvp_dt', .2), subclass_specific_data.get('iterative_bvp_max_t', 2))
+        self.set_trajectory(self.add_start_position(polys), traj_time)
+
+    @classmethod
+    def batch_construct(cls, start_states, end_states, num_dims, max_state, subclass_specific_data={}):
+        """
+        Construct one motion primitive per row of start_states and end_states ((N, n) arrays), solving the
+        boundary value problems of all of them in one stacked solve. Same as constructing them one by one,
+        except that the candidate durations of the iterative BVP (dt plus jitter) are drawn once and shared.
+        """
+        start_states = np.asarray(start_states, dtype=float)
+        end_states = np.asarray(end_states, dtype=float)
+        mps = []
+        for start_state, end_state in zip(start_states, end_states):
+            mp = cls.__new__(cls)
+            MotionPrimitive.__init__(mp, start_state, end_state, num_dims, max_state, subclass_specific_data)
+            mp.polynomial_setup(2 * mp.control_space_q - 1)
+            mps.append(mp)
+        if not mps:
+            return mps
+
+        dynamics = mps[0].subclass_specific_data['dynamics']
+        ts = cls.bvp_candidate_durations(subclass_specific_data.get('iterative_bvp_dt', .2),
+                                         subclass_specific_data.get('iterative_bvp_max_t', 2))
+        # (len(ts), N, num_dims, poly_order+1), every candidate duration for every primitive, with the start positions
+        # at zero like a single construction
+        polys_set = cls.solve_bvp_meam_620_style(*_centered_states(start_states, end_states, num_dims),
+                                                 num_dims, dynamics, ts[:, np.newaxis])
+        for i, mp in enumerate(mps):
+            polys, traj_time = cls.first_feasible_bvp_solution(ts, polys_set[:, i], mp.max_state, dynamics, mp.poly_multiplier)
+            mp.set_trajectory(mp.add_start_position(polys), traj_time)
+        return mps
+
+    def add_start_position(self, polys):
+        """
+        Copy of the polynomial coefficients of a BVP solved from a start position of zero, starting at start_state
+        """
+        if polys is None:
+            return None
+        polys = polys.copy()
+        polys[:, -1] += self.start_state[:self.num_dims]
+        return polys
+
+    def set_trajectory(self, poly_coeffs, traj_time):
+        """
+        Store the solution of the boundary value problem, poly_coeffs is None if there is none
+        """
+        self.poly_coeffs, self.traj_time = poly_coeffs, traj_time
         if self.poly_coeffs is not None:
             self.is_valid = True
             if self.subclass_specific_data.get('rho') is None:
@@ -36,8 +164,9 @@ class PolynomialMotionPrimitive(MotionPrimitive):
         self.poly_order = poly_order
         if self.subclass_specific_data.get("dynamics", None) is None:
             self.subclass_specific_data['dynamics'] = self.get_dynamics_polynomials(poly_order)
-        self.poly_multiplier = np.array([np.concatenate((np.zeros(deriv_num), self.subclass_specific_data['dynamics'][deriv_num](1)))[
-                                        :(poly_order+1)] for deriv_num in range(poly_order) for i in range(self.num_dims)])
+        # deriv_coeffs[k] * t**deriv_powers[k] is the kth derivative of the basis [t**poly_order, ..., t, 1]
+        self.deriv_coeffs, self.deriv_powers = _basis_derivative_coefficients(int(poly_order))
+        self.poly_multiplier = _poly_multiplier(int(poly_order), int(self.num_dims))
 
     @classmethod
     def from_dict(cls, dict, num_dims, max_state, subclass_specific_data={}):
@@ -70,8 +199,7 @@ class PolynomialMotionPrimitive(MotionPrimitive):
         Return:
             state, a numpy array of size (num_dims x control_space_q, len(t))
         """
-        return np.vstack([self.evaluate_polynomial_at_derivative(i, [t])
-                          for i in range(self.control_space_q)])
+        return self.sample_derivatives(self.control_space_q, np.atleast_1d(t))
 
     def get_input(self, t):
         return self.evaluate_polynomial_at_derivative(self.control_space_q, t)
@@ -81,8 +209,7 @@ class PolynomialMotionPrimitive(MotionPrimitive):
             st = np.linspace(0, self.traj_time, int(np.ceil(self.traj_time/step_size)+1))
             sampled_array = np.empty((1+self.n, st.shape[0]))
             sampled_array[0, :] = st
-            for i in range(self.control_space_q):
-                sampled_array[1+i*self.num_dims:1+(i+1)*self.num_dims] = self.evaluate_polynomial_at_derivative(i, st)
+            sampled_array[1:] = self.sample_derivatives(self.control_space_q, st)
             return sampled_array
         return None
 
@@ -102,11 +229,45 @@ class PolynomialMotionPrimitive(MotionPrimitive):
         else:
             return None, None
 
+    def plot(self, position_only=False, ax=None, color=None, zorder=1, step_size=.1, axes=None):
+        """
+        Sample the states and the input in one pass and plot them
+        """
+        if self.is_valid:
+            st = np.linspace(0, self.traj_time, int(np.ceil(self.traj_time/step_size)+1))
+            sampling_array = np.vstack((st, self.sample_derivatives(self.control_space_q+1, st)))
+            return self.plot_from_sampled_states(sampling_array, position_only, ax, color, zorder, axes)
+        else:
+            print("Trajectory was not found")
+
     def translate_start_position(self, start_pt):
         self.poly_coeffs[:, -1] = start_pt
         self.end_state[:self.num_dims] = self.end_state[:self.num_dims] - self.start_state[:self.num_dims] + start_pt
         self.start_state[:self.num_dims] = start_pt
 
+    def sample_derivatives(self, num_derivs, st):
+        """
+        Sample the first num_derivs derivatives of the polynomial trajectory at
+        the specified times, sharing one Vandermonde matrix of the sample times
+        between all derivatives
+        Input:
+            num_derivs, number of derivatives, starting from the position
+            st, numpy array of times to sample
+        Output:
+            sampled, (num_derivs x num_dims, len(st)) array, derivative by derivative
+        """
+        if self.poly_multiplier is None:
+            self.polynomial_setup(self.poly_order)
+
+        num_coeffs = self.poly_order + 1
+        # columns [t**poly_order, ..., t, 1], the kth derivative only uses the last num_coeffs-k of them, so its
+        # coefficients are shifted right by k and all derivatives are sampled with a single matrix product
+        V = np.vander(np.asarray(st, dtype=float), num_coeffs)
+        deriv_polys = np.zeros((num_derivs, self.num_dims, num_coeffs))
+        for k in range(num_derivs):
+            deriv_polys[k, :, k:] = self.poly_coeffs[:, :num_coeffs-k] * self.deriv_coeffs[k, :num_coeffs-k]
+        return deriv_polys.reshape(num_derivs * self.num_dims, num_coeffs) @ V.T
+
     def evaluate_polynomial_at_derivative(self, deriv_num, st):
         """
         Sample the specified derivative number of the polynomial trajectory at
@@ -135,8 +296,12 @@ class PolynomialMotionPrimitive(MotionPrimitive):
         """
         if (deriv_num+1)*polys.shape[0] > poly_multiplier.shape[0]:
             return None
-        p = np.roll(polys, deriv_num) * poly_multiplier[deriv_num*polys.shape[0]: (deriv_num+1)*polys.shape[0], :]
-        sampled = np.array([np.dot(dynamics[0](t), p.T) for t in st]).T
+        # coefficients of the derivative, the highest poly_order+1-deriv_num powers of polys scaled by the
+        # falling factorials (the first deriv_num columns of the block of poly_multiplier are the zero padding)
+        num_coeffs = polys.shape[1] - deriv_num
+        p = polys[:, :num_coeffs] * poly_multiplier[deriv_num*polys.shape[0]: (deriv_num+1)*polys.shape[0], deriv_num:]
+        # Horner over all sample times and dimensions at once, polyval wants the lowest order coefficient first
+        sampled = np.polynomial.polynomial.polyval(np.asarray(st, dtype=float), p[:, ::-1].T, tensor=True)
         return sampled
 
     @staticmethod
@@ -158,41 +323,39 @@ class PolynomialMotionPrimitive(MotionPrimitive):
                 represents the time derivatives of the specified polynomial with
                 the ith element of the array representing the ith derivative
         """
-        # construct polynomial of the form [T**5, T**4, T**3, T**2, T, 1]
-        t = sym.symbols('t')
-        x = np.squeeze(sym.Matrix([t**(order - i) for i in range(order + 1)]))
-
-        # iterate through relevant derivatives and make function for each
-        time_derivatives = []
-        for _ in range(order+1):
-            time_derivatives.append(sym.lambdify([t], x))
-            x = sym.derive_by_array(x, t)
-        return time_derivatives
+        coeffs, powers = _basis_derivative_coefficients(int(order))
+        return [_basis_derivative(coeffs[k], powers[k]) for k in range(order + 1)]
 
     @staticmethod
     def solve_bvp_meam_620_style(start_state, end_state, num_dims, dynamics, T):
         """
         Return polynomial coefficients for a trajectory from start_state ((n,) array) to end_state ((n,) array) in time interval [0,T]
         The array of lambda functions created in get_dynamics_polynomials and the dimension of the configuration space are also required.
+        A is assembled from the same basis, cached per control_space_q, so only its t=T rows are evaluated per call,
+        and its t=0 rows are substituted directly, leaving a control_space_q x control_space_q system.
+        T may also be an array of durations and start_state, end_state stacks of states ((..., n) arrays), then
+        all problems (the broadcast of T with the leading dimensions of the states) are solved as one stack and
+        polys has shape (*broadcast shape, num_dims, poly_order+1).
         """
-        control_space_q = int(start_state.shape[0]/num_dims)
-        poly_order = (control_space_q)*2-1
-        A = np.zeros((poly_order+1, poly_order+1))
-        for i in range(control_space_q):
-            x = dynamics[i]  # iterate through all the derivatives
-            A[i, :] = x(0)  # x(ti) = start_state
-            A[control_space_q+i, :] = x(T)  # x(tf) = end_state
-
-        polys = np.zeros((num_dims, poly_order+1))
-        b = np.zeros(control_space_q*2)
-        for i in range(num_dims):  # Construct a separate polynomial for each dimension
-
-            # vector of the form [start_state,end_state,start_state_dot,end_state_dot,...]
-            b[: control_space_q] = start_state[i:: num_dims]
-            b[control_space_q:] = end_state[i:: num_dims]
-            poly = np.linalg.solve(A, b)
-
-            polys[i, :] = poly
+        start_state = np.asarray(start_state, dtype=float)
+        end_state = np.asarray(end_state, dtype=float)
+        control_space_q = int(start_state.shape[-1]/num_dims)
+        start_factorials, end_coeffs, end_powers = _boundary_matrix_terms(control_space_q)
+        # rows [x(T), x'(T), ...] of the basis derivatives
+        end_rows = end_coeffs * np.power(np.asarray(T, dtype=float)[..., np.newaxis, np.newaxis], end_powers)
+
+        # one column per dimension of the form [start_state,start_state_dot,...] and [end_state,end_state_dot,...]
+        # so a single factorization solves for the polynomials of all dimensions
+        b_start = start_state.reshape(start_state.shape[:-1] + (control_space_q, num_dims))
+        b_end = end_state.reshape(end_state.shape[:-1] + (control_space_q, num_dims))
+        # x^(i)(0) = i! * coefficient of t**i, so the start state fixes the low order half of the coefficients
+        # (t**(control_space_q-1), ..., 1) and only the high order half is left to solve for from the end state
+        low = (b_start / start_factorials[:, np.newaxis])[..., ::-1, :]
+        rhs = b_end - end_rows[..., control_space_q:] @ low
+        A_high = end_rows[..., :control_space_q]
+        batch_shape = np.broadcast_shapes(A_high.shape[:-2], rhs.shape[:-2])
+        high = np.linalg.solve(np.broadcast_to(A_high, batch_shape + A_high.shape[-2:]), rhs)
+        polys = np.swapaxes(np.concatenate((high, np.broadcast_to(low, high.shape)), axis=-2), -1, -2)
 
         return polys
 
@@ -200,37 +363,60 @@ class PolynomialMotionPrimitive(MotionPrimitive):
     def iteratively_solve_bvp_meam_620_style(start_state, end_states, num_dims, max_state, dynamics, dt, max_t, poly_multiplier):
         """
         Given a start and goal pt, iterate over solving the BVP until the input constraint is satisfied-ish.
+        The candidate durations (steps of dt plus jitter up to max_t) are drawn and solved in one batch, and
+        the shortest feasible one is returned (see first_feasible_bvp_solution).
+        """
+        ts = PolynomialMotionPrimitive.bvp_candidate_durations(dt, max_t)
+        polys_set = PolynomialMotionPrimitive.solve_bvp_meam_620_style(start_state, end_states, num_dims, dynamics, ts)
+        return PolynomialMotionPrimitive.first_feasible_bvp_solution(ts, polys_set, max_state, dynamics, poly_multiplier)
+
+    @staticmethod
+    def bvp_candidate_durations(dt, max_t):
+        """
+        Candidate durations of the iterative BVP, steps of dt plus a random jitter of up to dt/5, up to max_t
+        """
+        # every step is at least dt, so this many steps always reach past max_t
+        num_steps = int(np.ceil(max_t / dt)) + 1
+        ts = np.cumsum(dt + np.random.rand(num_steps)*dt/5.)
+        return ts[ts <= max_t]
+
+    @staticmethod
+    def first_feasible_bvp_solution(ts, polys_set, max_state, dynamics, poly_multiplier):
+        """
+        Return the polynomial coefficients and duration of the shortest of the candidate BVP solutions
+        (polys_set, (len(ts), num_dims, poly_order+1)) that satisfies the state and input limits, or None, inf.
+        Candidates that already exceed a limit on a coarse grid of sample times are rejected for all
+        candidates at once, only the others get the exact critical point check, in order.
         """
-        def check_max_state_and_input(polys):
-            critical_pts = np.zeros(polys.shape[1] + 2)
-            critical_pts[:2] = [0, t]
+        def check_max_state_and_input(polys, t):
             for k in range(1, control_space_q+1):
-                u_max = 0
-                for i in range(num_dims):
-                    roots = np.roots((polys*dynamics[k + 1](1))[i, :])
-                    roots = roots[np.isreal(roots)]
-                    critical_pts[2:2+roots.shape[0]] = roots
-                    critical_pts[2+roots.shape[0]:] = 0
-                    critical_us = PolynomialMotionPrimitive.evaluate_polynomial_at_derivative_static(
-                        k, critical_pts, dynamics, polys, poly_multiplier)
-                    u_max = max(u_max, np.max(np.abs(critical_us)))
-                if u_max > max_state[k]:
+                # the extrema of the kth derivative on [0, t] are at t=0, t or real roots of the (k+1)th
+                # derivative inside the interval, roots of every dimension evaluated for all dimensions in one reduction
+                roots = np.concatenate([np.roots(deriv_poly) for deriv_poly in polys*deriv_coeffs[k + 1]])
+                roots = roots[np.isreal(roots)].real
+                critical_pts = np.concatenate(([0, t], roots[(roots > 0) & (roots < t)]))
+                critical_us = PolynomialMotionPrimitive.evaluate_polynomial_at_derivative_static(
+                    k, critical_pts, dynamics, polys, poly_multiplier)
+                if np.max(np.abs(critical_us)) > max_state[k]:
                     return False
             return True
 
-        t = 0
-        polys = None
-        control_space_q = int(start_state.shape[0]/num_dims)
-        done = False
-        while not done:
-            t += dt + float(np.random.rand(1)*dt/5.)
-            if t > max_t:
-                polys = None
-                t = np.inf
-                break
-            polys = PolynomialMotionPrimitive.solve_bvp_meam_620_style(start_state, end_states, num_dims, dynamics, t)
-            done = check_max_state_and_input(polys)
-        return polys, t
+        control_space_q = polys_set.shape[-1] // 2
+        # the basis derivative coefficients, evaluated once for all candidates instead of per dimension and derivative
+        deriv_coeffs = np.array([x(1) for x in dynamics])
+        # the derivative limits must already hold on a coarse grid of sample times, a cheap necessary
+        # condition evaluated for all candidates at once (the exact check includes the extrema on [0, t]).
+        # The grid includes t=0 and t, where boundary states on a limit are evaluated a few ulps off from the
+        # exact check, so the screen has some slack to stay necessary
+        sample_ts = ts[:, np.newaxis] * np.linspace(0, 1, 5)
+        maybe_feasible = np.ones(ts.shape[0], dtype=bool)
+        for k in range(1, control_space_q+1):
+            sampled = np.einsum('ndp,nsp->nds', polys_set, dynamics[k](sample_ts[..., np.newaxis]))
+            maybe_feasible &= np.abs(sampled).max(axis=(1, 2), initial=0) <= max_state[k] * (1 + 1e-9) + 1e-12
+        for t, polys in zip(ts[maybe_feasible], polys_set[maybe_feasible]):
+            if check_max_state_and_input(polys, t):
+                return polys, float(t)
+        return None, np.inf
 
 
 if __name__ == "__main__":
@@ -47,8 +47,27 @@ class RuckigMotionPrimitive(MotionPrimitive):
         self.cost = self.traj_time
         # self.subclass_specific_data['ruckig_trajectory'] = first_output.trajectory
         # self.poly_coeffs = self.get_spline_traj(first_output.trajectory)
+        self._traj = first_output.trajectory
         return first_output.trajectory
 
+    def get_trajectory(self):
+        """
+        Return the Ruckig trajectory, only running Ruckig if it has not been
+        computed yet (or was dropped by pickling/translation)
+        """
+        if getattr(self, '_traj', None) is None:
+            self.run_ruckig()
+        return self._traj
+
+    def __getstate__(self):
+        # the Ruckig trajectory can't be pickled (which deepcopy in the graph search relies on), recompute it lazily instead
+        state = self.__dict__.copy()
+        state['_traj'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
     @classmethod
     def from_dict(cls, dict, num_dims, max_state, subclass_specific_data={}):
         mp = super().from_dict(dict, num_dims, max_state)
@@ -62,19 +81,17 @@ class RuckigMotionPrimitive(MotionPrimitive):
 
     def get_state(self, t, traj=None):
         if traj is None:
-            traj = self.run_ruckig()
+            traj = self.get_trajectory()
         pos, vel, acc = traj.at_time(t)
         return np.hstack((pos, vel, acc))
 
     def get_sampled_states(self, step_size=0.1):
-        traj = self.run_ruckig()  # TODO running too much, should be able to save it. Problems arise with pickling, which is called by deepcopy in the graph search atm
+        traj = self.get_trajectory()
         if self.is_valid:
             st = np.linspace(0, self.traj_time, int(np.ceil(self.traj_time/step_size)+1))
-            sampled_array = np.empty((1+self.n, st.shape[0]))
-            sampled_array[0, :] = st
-            for i, t in enumerate(st):
-                sampled_array[1:, i] = self.get_state(t, traj)
-            return sampled_array
+            # Trajectory.at_time only takes scalar times, but one (pos, vel, acc) list per sample goes straight into the array
+            states = np.array([traj.at_time(t) for t in st], dtype=float).reshape(st.shape[0], self.n)
+            return np.vstack((st, states.T))
         return None
 
     def get_sampled_position(self, step_size=0.1):
@@ -91,15 +108,14 @@ class RuckigMotionPrimitive(MotionPrimitive):
             if sampled_array is not None:
                 jerk = np.zeros((self.num_dims, sampled_array.shape[1]))
                 acceleration = sampled_array[1+self.num_dims*2:1+self.num_dims*3, :]
-                for i in range(sampled_array.shape[1]-1):
-                    jerk[:, i] = (acceleration[:, i+1] - acceleration[:, i])/step_size
+                jerk[:, :-1] = np.diff(acceleration, axis=1)/step_size
                 return sampled_array[0, :], jerk
         return None, None
 
     def translate_start_position(self, start_pt):
         self.end_state[:self.num_dims] = self.end_state[:self.num_dims] - self.start_state[:self.num_dims] + start_pt
         self.start_state[:self.num_dims] = start_pt
-        # self.run_ruckig()
+        self._traj = None  # recomputed from the translated states when next needed
 
     def get_spline_traj(self, traj):
         jerk_time_array = np.array(traj.jerks_and_times)
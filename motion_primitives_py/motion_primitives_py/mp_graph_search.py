@@ -341,8 +341,16 @@ class GraphSearch:
                     open_list.append(sp[:, -1])
                     self.lines[0][j].set_data(sp[0, :], sp[1, :])
             if open_list != []:
-                self.open_list_states_animation = np.vstack((self.open_list_states_animation, np.array(open_list)))
-                self.lines[4].set_data(self.open_list_states_animation[:, 0], self.open_list_states_animation[:, 1])
+                # write into a buffer that doubles when full instead of re-stacking every frame
+                start = self.num_open_list_states_animation
+                self.num_open_list_states_animation += len(open_list)
+                if self.num_open_list_states_animation > self.open_list_states_animation.shape[0]:
+                    buffer = np.empty((2*self.num_open_list_states_animation, self.num_dims))
+                    buffer[:start] = self.open_list_states_animation[:start]
+                    self.open_list_states_animation = buffer
+                self.open_list_states_animation[start:self.num_open_list_states_animation] = open_list
+                open_list_states = self.open_list_states_animation[:self.num_open_list_states_animation]
+                self.lines[4].set_data(open_list_states[:, 0], open_list_states[:, 1])
         self.lines[3].set_data(closed_set_states[0, :i+1, ], closed_set_states[1, :i+1])
         return self.lines
 
@@ -373,7 +381,9 @@ class GraphSearch:
             circle_patch = None
         self.lines = [mp_lines, start_line, goal_line, closed_set_line, open_set_line, circle_patch]
         closed_set = np.array([node.state for node in self.closed_nodes]).T
-        self.open_list_states_animation = self.start_state[:self.num_dims]
+        self.open_list_states_animation = np.empty((1 + len(self.closed_nodes)*self.num_mps, self.num_dims))
+        self.open_list_states_animation[0] = self.start_state[:self.num_dims]
+        self.num_open_list_states_animation = 1
         ani = animation.FuncAnimation(f, self.animation_helper, len(self.closed_nodes)+10,
                                       interval=100, fargs=(closed_set,), repeat=False)
 
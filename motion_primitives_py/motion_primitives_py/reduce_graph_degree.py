@@ -1,3 +1,5 @@
+import numpy as np
+
 
 def reduce_graph_degree(mpl):
     pts, independent = mpl.uniform_state_set(mpl.max_state[:mpl.control_space_q], mpl.resolution[:mpl.control_space_q], random=False)
@@ -60,7 +62,6 @@ def bfs(mpl, i, j):
 
 
 if __name__ == "__main__":
-    import numpy as np
     import matplotlib.pyplot as plt
     from motion_primitives_py import *
 
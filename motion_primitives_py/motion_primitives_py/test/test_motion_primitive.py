@@ -1,5 +1,6 @@
 import numpy as np
 import pytest
+from motion_primitives_py import PolynomialMotionPrimitive, EuclideanMotionPrimitive
 
 
 similarity_threshold = 1e-1
@@ -45,5 +46,72 @@ def test_max_state(mp_state_input_fixture):
     assert (abs(sampling[1+fx.num_dims*3:1+fx.num_dims*4]) < fx.max_state[3] + similarity_threshold).all()
 
 
+def test_polynomial_boundary_state_on_limit(monkeypatch):
+    # the end acceleration and velocity are on their limits, the candidate durations must not be rejected
+    # by the coarse screen of the BVP solutions for the round-off of evaluating them there
+    monkeypatch.setattr(np.random, "rand", lambda *shape: np.zeros(shape))
+    num_dims = 2
+    max_state = np.array([10, 1, 1, 1])
+    start_state = np.array([3, 0, 0, 0, 0, 0])
+    end_state = np.array([0, 0, 0, 1, 1, 0])
+    mp = PolynomialMotionPrimitive(start_state, end_state, num_dims, max_state, {'iterative_bvp_max_t': 10})
+    assert mp.is_valid
+    assert mp.traj_time == pytest.approx(6)
+
+
+def test_polynomial_batch_construct(monkeypatch):
+    # without the jitter the candidate BVP durations are the same for both constructions
+    monkeypatch.setattr(np.random, "rand", lambda *shape: np.zeros(shape))
+    num_dims = 2
+    max_state = np.array([10, 3, 3, 3])
+    rng = np.random.RandomState(0)
+    start_states = rng.randn(20, 3 * num_dims) * .5
+    end_states = rng.randn(20, 3 * num_dims) * .5
+    mps = PolynomialMotionPrimitive.batch_construct(start_states, end_states, num_dims, max_state, {'rho': 1})
+    assert len(mps) == len(start_states)
+    assert any(mp.is_valid for mp in mps)
+    for mp, start_state, end_state in zip(mps, start_states, end_states):
+        expected = PolynomialMotionPrimitive(start_state, end_state, num_dims, max_state, {'rho': 1})
+        assert mp.is_valid == expected.is_valid
+        assert mp.traj_time == expected.traj_time
+        if expected.is_valid:
+            assert mp.cost == expected.cost
+            assert (mp.poly_coeffs == expected.poly_coeffs).all()
+
+
+def test_polynomial_translated_copy():
+    num_dims = 2
+    max_state = np.array([10, 3, 3, 3])
+    start_state = np.array([0, 0, .1, .2, 0, 0])
+    end_state = np.array([.3, .1, 0, 0, 0, 0])
+    offset = np.array([5, -3, 0, 0, 0, 0])
+    mp = PolynomialMotionPrimitive(start_state, end_state, num_dims, max_state)
+    # the BVP of the translated copy is the same, only the constant terms of the polynomials are shifted
+    translated = PolynomialMotionPrimitive(start_state + offset, end_state + offset, num_dims, max_state)
+    assert mp.is_valid and translated.is_valid
+    assert mp.traj_time == translated.traj_time
+    assert np.allclose(translated.poly_coeffs[:, :-1], mp.poly_coeffs[:, :-1])
+    assert np.allclose(translated.poly_coeffs[:, -1], mp.poly_coeffs[:, -1] + offset[:num_dims])
+    # translating one does not change the other
+    translated.translate_start_position([1, 1])
+    assert np.allclose(mp.poly_coeffs[:, -1], start_state[:num_dims])
+
+
+def test_euclidean_get_state():
+    num_dims = 2
+    start_state = np.array([0, 1, 2, 3, 4, 5])
+    end_state = np.array([2, -1, 0, 3, 1, 1])
+    mp = EuclideanMotionPrimitive(start_state, end_state, num_dims, np.ones(4))
+    assert mp.get_state(0).shape == (len(start_state), 1)
+    assert np.allclose(mp.get_state(0)[:, 0], start_state)
+    assert np.allclose(mp.get_state(1.)[:, 0], end_state)
+    t = np.array([0, .25, 1])
+    state = mp.get_state(t)
+    assert state.shape == (len(start_state), len(t))
+    assert np.allclose(state[:, 0], start_state)
+    assert np.allclose(state[:, 1], start_state + .25 * (end_state - start_state))
+    assert np.allclose(state[:, 2], end_state)
+
+
 if __name__ == "__main__":
     pytest.main(["-v", "--disable-pytest-warnings", __file__])
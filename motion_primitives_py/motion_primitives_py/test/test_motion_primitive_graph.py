@@ -0,0 +1,78 @@
+import pytest
+import numpy as np
+from motion_primitives_py import MotionPrimitiveGraph, EuclideanMotionPrimitive
+from motion_primitives_py import motion_primitive_graph
+
+
+@pytest.fixture(params=["numba", "numpy"])
+def greedy_impl(request, monkeypatch):
+    if request.param == "numba":
+        if motion_primitive_graph.compiled_greedy_min_dispersion_indices() is None:
+            pytest.skip("numba is not installed")
+    else:
+        monkeypatch.setattr(motion_primitive_graph, "compiled_greedy_min_dispersion_indices", lambda: None)
+    return request.param
+
+
+def test_dispersion_distance_fn_simple_norm():
+    mpg = MotionPrimitiveGraph(2, 2, [1, 1, 1], EuclideanMotionPrimitive)
+    start_pts = (np.random.rand(50, mpg.n) * 2 - 1) * [3, 3, 1, 1]
+    end_pts = (np.random.rand(20, mpg.n) * 2 - 1) * [3, 3, 1, 1]
+    score, _ = mpg.dispersion_distance_fn_simple_norm(start_pts, end_pts)
+    expected = np.linalg.norm(start_pts[:, np.newaxis] - end_pts, axis=2)
+    assert np.allclose(score, expected, rtol=1e-12, atol=1e-12)
+
+    # nearby points far from the origin, prone to cancellation in the squared norm expansion
+    start_pts = 1e4 + np.random.rand(5, mpg.n) * 1e-5
+    end_pts = 1e4 + np.random.rand(3, mpg.n) * 1e-5
+    score, _ = mpg.dispersion_distance_fn_simple_norm(start_pts, end_pts)
+    expected = np.linalg.norm(start_pts[:, np.newaxis] - end_pts, axis=2)
+    assert np.allclose(score, expected, rtol=1e-3, atol=0)
+
+    score, _ = mpg.dispersion_distance_fn_simple_norm(start_pts, end_pts[:1])
+    assert score.shape == (5, 1)
+    assert np.allclose(score, expected[:, :1], rtol=1e-12, atol=0)
+
+
+def test_min_dispersion_points(greedy_impl):
+    mpg = MotionPrimitiveGraph(2, 2, [1, 1, 1], EuclideanMotionPrimitive)
+    potential_sample_pts = np.random.rand(200, mpg.n)
+    starting_score = np.linalg.norm(potential_sample_pts, axis=1)
+    start_index = np.argmin(starting_score)
+    num_output_pts = 10
+    pts, indices = mpg.compute_min_dispersion_points(num_output_pts, potential_sample_pts, starting_score, start_index)
+
+    # brute force farthest point sampling, recomputing all distances every iteration
+    expected = [start_index]
+    for _ in range(1, num_output_pts):
+        dists = np.linalg.norm(potential_sample_pts[:, np.newaxis] - potential_sample_pts[expected[1:]], axis=2)
+        score = np.amin(np.hstack((starting_score[:, np.newaxis], dists)), axis=1)
+        score[expected] = -np.inf
+        expected.append(np.argmax(score))
+    assert (indices == expected).all()
+    assert (pts == potential_sample_pts[expected]).all()
+
+
+def test_min_dispersion_points_numba_matches_numpy(monkeypatch):
+    if motion_primitive_graph.compiled_greedy_min_dispersion_indices() is None:
+        pytest.skip("numba is not installed")
+    mpg = MotionPrimitiveGraph(2, 2, [1, 1, 1], EuclideanMotionPrimitive)
+    # evenly spaced grid, lots of ties in the greedy argmax
+    potential_sample_pts = mpg.uniform_state_set([1, 1], [.25, .5])
+    starting_score = np.linalg.norm(potential_sample_pts, axis=1)
+    start_index = np.argmin(starting_score)
+    _, numba_indices = mpg.compute_min_dispersion_points(30, potential_sample_pts, starting_score, start_index)
+    monkeypatch.setattr(motion_primitive_graph, "compiled_greedy_min_dispersion_indices", lambda: None)
+    _, numpy_indices = mpg.compute_min_dispersion_points(30, potential_sample_pts, starting_score, start_index)
+    assert (numba_indices == numpy_indices).all()
+
+
+def test_min_dispersion_points_starting_score_shape():
+    mpg = MotionPrimitiveGraph(2, 2, [1, 1, 1], EuclideanMotionPrimitive)
+    potential_sample_pts = np.random.rand(20, mpg.n)
+    with pytest.raises(AssertionError, match="starting_score"):
+        mpg.compute_min_dispersion_points(5, potential_sample_pts, np.ones((20, 3)), 0)
+
+
+if __name__ == '__main__':
+    pytest.main(["-v", "--disable-pytest-warnings", __file__])
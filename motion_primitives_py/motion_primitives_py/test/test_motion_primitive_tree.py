@@ -0,0 +1,34 @@
+import pytest
+import numpy as np
+from motion_primitives_py import MotionPrimitiveTree, InputsMotionPrimitive
+import tempfile
+import os
+
+
+def test_min_dispersion_set():
+    mpt = MotionPrimitiveTree(2, 2, [1, 1, 1, 100], InputsMotionPrimitive)
+    start_pt = np.zeros((mpt.n, 1))
+    num_u_per_dimension, num_u_set, num_dts = 3, 5, 4
+    dts_us = mpt.compute_min_dispersion_set(start_pt, num_u_per_dimension, num_u_set, num_dts, .1, 1)
+    assert dts_us.shape == (1 + mpt.num_dims, num_u_per_dimension**mpt.num_dims)
+    for dt, *u in dts_us.T:
+        mp = InputsMotionPrimitive(start_pt[:, 0], None, mpt.num_dims, mpt.max_state, {'u': np.array(u), 'dt': dt})
+        assert np.allclose(mp.get_state(np.array([0]))[:, 0], start_pt[:, 0])
+
+
+def test_lookup_table_save_load():
+    mpt = MotionPrimitiveTree(2, 2, [1, 1, 1, 100], InputsMotionPrimitive)
+    with tempfile.TemporaryDirectory() as td:
+        f_name = os.path.join(td, 'temp.npz')
+        mpt.create_state_space_MP_lookup_table_tree(2, 3, 5, 4, .1, 1, filename=f_name)
+        mpt2 = MotionPrimitiveTree.load(f_name)
+    assert mpt.dts.shape == (3**mpt.num_dims, 2**mpt.num_dims)
+    for attr in ['start_pts', 'dts', 'us', 'end_states', 'max_state']:
+        assert (getattr(mpt, attr) == getattr(mpt2, attr)).all()
+    assert mpt.motion_primitive_type == mpt2.motion_primitive_type
+    mp = InputsMotionPrimitive(mpt.start_pts[1], None, mpt.num_dims, mpt.max_state, {'u': mpt.us[1, :, 2], 'dt': mpt.dts[1, 2]})
+    assert np.allclose(mp.end_state, mpt.end_states[1, 2])
+
+
+if __name__ == '__main__':
+    pytest.main(["-v", "--disable-pytest-warnings", __file__])
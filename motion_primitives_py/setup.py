@@ -11,5 +11,6 @@ setup(name='motion_primitives_py', version='0.0.1', packages=['motion_primitives
                         'cvxpy',
                         'reeds_shepp @ git+https://git@github.com/ghliu/pyReedsShepp#egg=reeds_shepp',
                         'sobol_seq @ git+https://git@github.com/naught101/sobol_seq@v0.2.0#egg=sobol_seq'
-                        ]
+                        ],
+      extras_require={'numba': ['numba']}
       )